@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import polars as pl
+from prover.adapter.memory import (
+    ADDRESS,
+    WORD_COLUMNS,
+    ChunkedMemory,
+)
+
+RANGE_CHECK_SEGMENT = "range_check"
+BITWISE_SEGMENT = "bitwise"
+POSEIDON_SEGMENT = "poseidon"
+PEDERSEN_SEGMENT = "pedersen"
+
+CELLS_PER_INSTANCE = {
+    RANGE_CHECK_SEGMENT: 1,
+    BITWISE_SEGMENT: 5,
+    POSEIDON_SEGMENT: 6,
+    PEDERSEN_SEGMENT: 3,
+}
+
+_COL_INSTANCE = "instance"
+_COL_CELL = "cell"
+
+INSTANCE = pl.col(_COL_INSTANCE)
+
+
+def cell_words(index: int, name: str) -> list[pl.Expr]:
+    """Words of the felt in a cell, aliased after `name`."""
+    return [
+        pl.col(f"{_COL_CELL}_{index}_{column}").alias(f"{name}_{column}")
+        for column in WORD_COLUMNS
+    ]
+
+
+def read_segments(file_path: Path) -> dict[str, tuple[int, int]]:
+    """Read the `[begin_addr, stop_ptr)` memory segments from the runner's public input."""
+    with open(file_path) as f:
+        memory_segments = json.load(f)["memory_segments"]
+    return {
+        name: (segment["begin_addr"], segment["stop_ptr"])
+        for name, segment in memory_segments.items()
+    }
+
+
+def builtin_instances(segment: pl.DataFrame, begin: int, cells: int) -> pl.DataFrame:
+    """Reshape a builtin segment into one row per instance, with the words of each
+    cell, as the 128 bits memory values would truncate the felts.
+
+    Cells missing from memory (e.g. unused outputs) are null.
+    """
+    offset = ADDRESS.cast(pl.Int64) - begin
+    return (
+        segment.with_columns(
+            offset.floordiv(cells).alias(_COL_INSTANCE),
+            (offset % cells).alias(_COL_CELL),
+        )
+        .group_by(_COL_INSTANCE)
+        .agg(
+            pl.col(column)
+            .filter(pl.col(_COL_CELL).eq(i))
+            .first()
+            .alias(f"{_COL_CELL}_{i}_{column}")
+            for i in range(cells)
+            for column in WORD_COLUMNS
+        )
+        .sort(_COL_INSTANCE)
+    )
+
+
+def read_builtins(
+    memory: ChunkedMemory, segments: dict[str, tuple[int, int]]
+) -> dict[str, pl.DataFrame]:
+    """Instances of all the builtins used by the program, keyed by builtin name."""
+    return {
+        name: builtin_instances(
+            memory.segment(begin, stop), begin, CELLS_PER_INSTANCE[name]
+        )
+        for name, (begin, stop) in segments.items()
+        if name in CELLS_PER_INSTANCE
+    }
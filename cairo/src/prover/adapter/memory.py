@@ -1,73 +1,261 @@
 import os
 import struct
+from collections.abc import Iterator, Sequence
 from pathlib import Path
 
 import polars as pl
 from loguru import logger
+from prover.instrumentation import INSTRUMENTATION
 
 DEFAULT_PRIME = 2**251 + 17 * 2**192 + 1
 
 _COL_ADDRESS = "address"
 _COL_VALUE = "value"
+_COL_WORD = "word"
+_COL_FIRST_ADDRESS = "first_address"
+_COL_LAST_ADDRESS = "last_address"
 
 # Using UInt32 should be enough for the memory, polars will raise in case of overflow
 ADDRESS = pl.col(_COL_ADDRESS).cast(pl.UInt32)
 VALUE = pl.col(_COL_VALUE).cast(pl.Int128)
 
-MEMORY_SCHEMA = pl.Schema({_COL_ADDRESS: pl.UInt32, _COL_VALUE: pl.Int128})
+# A felt is stored as 4 little-endian 64 bits words
+FELT_WORDS = 4
+FELT_WORD_BITS = 64
+WORD_COLUMNS = [f"{_COL_WORD}_{i}" for i in range(FELT_WORDS)]
 
+# `value` is the signed felt truncated to 128 bits, the words hold the exact felt
+MEMORY_SCHEMA = pl.Schema(
+    {
+        _COL_ADDRESS: pl.UInt32,
+        _COL_VALUE: pl.Int128,
+        **{column: pl.UInt64 for column in WORD_COLUMNS},
+    }
+)
 
-def read_memory(file_path: Path) -> pl.LazyFrame:
 
+def felt_bits(words: Sequence[pl.Expr], start: int, length: int) -> pl.Expr:
+    """Bits `[start, start + length)` of felts given as words, `length` up to 64."""
+    index, shift = divmod(start, FELT_WORD_BITS)
+    bits = words[index].floordiv(2**shift)
+    if shift + length > FELT_WORD_BITS:
+        high_bits = shift + length - FELT_WORD_BITS
+        bits = bits | (words[index + 1] & (2**high_bits - 1)) * 2 ** (
+            FELT_WORD_BITS - shift
+        )
+    return bits & (2**length - 1)
+
+
+def _read_chunks(file_path: Path, chunk_size: int) -> Iterator[pl.DataFrame]:
     record_size = 40  # 8 bytes address + 32 bytes value
-    chunk_size = record_size * 1024 * 1024  # Process 40MB chunks (adjust as needed)
     total_size = os.path.getsize(file_path)
     logger.info(f"Memory file total size: {total_size / (1024 * 1024 * 1024):.2f} GB")
     memory_len = total_size // record_size
 
     unpack_format_string = "<5Q"
 
-    chunk_dfs = []
-
     iteration = 0
-    total_iterations = memory_len // (chunk_size // record_size)
+    total_iterations = memory_len // chunk_size
     with open(file_path, "rb") as f:
         while True:
-            chunk = f.read(chunk_size)
+            chunk = f.read(record_size * chunk_size)
             if not chunk:
                 break
             logger.info(f"Processing chunk {iteration}/{total_iterations}")
 
-            chunk_addresses = []
-            chunk_value = []
-            for i in range(0, len(chunk), record_size):
-                if i + record_size > len(chunk):
-                    continue
+            with INSTRUMENTATION.stage("read_memory", chunk=iteration) as record:
+                chunk_addresses = []
+                chunk_value = []
+                chunk_words = [[] for _ in range(FELT_WORDS)]
+                for i in range(0, len(chunk), record_size):
+                    if i + record_size > len(chunk):
+                        continue
+
+                    unpacked_data = struct.unpack(
+                        unpack_format_string, chunk[i : i + record_size]
+                    )
+                    address = unpacked_data[0]
+                    felt = (
+                        unpacked_data[1]
+                        + 2**64 * unpacked_data[2]
+                        + 2**128 * unpacked_data[3]
+                        + 2**192 * unpacked_data[4]
+                    ) % DEFAULT_PRIME
+                    value = felt if felt < DEFAULT_PRIME // 2 else felt - DEFAULT_PRIME
+                    # Bigger values are only exact in the words
+                    value = (value + 2**127) % 2**128 - 2**127
+
+                    chunk_addresses.append(address)
+                    chunk_value.append(value)
+                    for word, words in enumerate(chunk_words):
+                        words.append(
+                            (felt >> (FELT_WORD_BITS * word)) % 2**FELT_WORD_BITS
+                        )
 
-                unpacked_data = struct.unpack(
-                    unpack_format_string, chunk[i : i + record_size]
-                )
-                address = unpacked_data[0]
-                value = (
-                    unpacked_data[1]
-                    + 2**64 * unpacked_data[2]
-                    + 2**128 * unpacked_data[3]
-                    + 2**192 * unpacked_data[4]
-                ) % DEFAULT_PRIME
-                value = value if value < DEFAULT_PRIME // 2 else value - DEFAULT_PRIME
-                # TODO: remove and handle bigger values
-                value = (value + 2**127) % 2**128 - 2**127
-
-                chunk_addresses.append(address)
-                chunk_value.append(value)
-
-            if chunk_addresses:
                 chunk_df = pl.DataFrame(
-                    {"address": chunk_addresses, "value": chunk_value},
+                    {
+                        _COL_ADDRESS: chunk_addresses,
+                        _COL_VALUE: chunk_value,
+                        **dict(zip(WORD_COLUMNS, chunk_words, strict=True)),
+                    },
                     schema=MEMORY_SCHEMA,
-                )
-                chunk_dfs.append(chunk_df.lazy())
+                ).sort(_COL_ADDRESS)
+                record["bytes_read"] = len(chunk)
+                record["rows"] = len(chunk_addresses)
 
             iteration += 1
+            if not chunk_df.is_empty():
+                yield chunk_df
+
+
+def read_memory_chunks(
+    file_path: Path, chunk_size: int = 2**20, sort: bool = False
+) -> Iterator[pl.DataFrame]:
+    """Read the memory `chunk_size` records at a time, in address order.
+
+    Without `sort`, the file must be in address order, as written by the runner, and
+    a ValueError is raised otherwise, since the memory is never loaded as a whole.
+    With `sort`, it is loaded and sorted in RAM, so that any dump is accepted.
+    """
+    chunks = _read_chunks(file_path, chunk_size)
+    if sort:
+        yield from (
+            pl.concat([pl.DataFrame(schema=MEMORY_SCHEMA), *chunks])
+            .sort(_COL_ADDRESS)
+            .iter_slices(chunk_size)
+        )
+        return
+
+    last_address = -1
+    for index, chunk in enumerate(chunks):
+        if chunk.get_column(_COL_ADDRESS)[0] <= last_address:
+            raise ValueError(
+                f"Memory file {file_path} is not sorted by address: chunk {index} "
+                "overlaps the previous one, use the join memory resolution to sort it"
+            )
+        last_address = chunk.get_column(_COL_ADDRESS)[-1]
+        yield chunk
+
+
+def memory_index(files: list[Path]) -> pl.LazyFrame:
+    """First and last address of each address-sorted memory chunk file."""
+    return pl.concat(
+        [
+            pl.scan_ipc(file_path).select(
+                pl.col(_COL_ADDRESS).first().alias(_COL_FIRST_ADDRESS),
+                pl.col(_COL_ADDRESS).last().alias(_COL_LAST_ADDRESS),
+            )
+            for file_path in files
+        ]
+    )
+
+
+class ChunkedMemory:
+    """Address-sorted memory split in chunk files, with an index of their first and
+    last addresses so that reads only load the chunks they need."""
+
+    def __init__(self, files: list[Path], index: pl.DataFrame):
+        self.files = files
+        self.first = index.get_column(_COL_FIRST_ADDRESS).cast(pl.Int64)
+        self.last = index.get_column(_COL_LAST_ADDRESS).cast(pl.Int64)
+
+    def lazy(self) -> pl.LazyFrame:
+        """Addresses and values of the whole memory, for hash joins."""
+        return pl.scan_ipc(self.files).select(_COL_ADDRESS, _COL_VALUE)
+
+    def chunk(self, index: int) -> pl.DataFrame:
+        return pl.read_ipc(self.files[index])
+
+    def segment(self, begin: int, stop: int) -> pl.DataFrame:
+        """The `[begin, stop)` addresses, read from the chunks overlapping them only."""
+        start = self.last.search_sorted(begin, side="left")
+        end = self.first.search_sorted(stop, side="left")
+        return pl.concat(
+            [
+                pl.DataFrame(schema=MEMORY_SCHEMA),
+                *(
+                    self.chunk(index).filter(
+                        pl.col(_COL_ADDRESS).is_between(begin, stop, closed="left")
+                    )
+                    for index in range(start, end)
+                ),
+            ]
+        )
+
+
+def merge_memory(
+    addresses: pl.Series,
+    memory: ChunkedMemory,
+    columns: Sequence[str] = (_COL_VALUE,),
+) -> pl.DataFrame:
+    """Memory `columns` at `addresses`, read with one sequential pass over the chunks.
+
+    The requested addresses are sorted, the chunk holding the next one is found with
+    the chunk index, so that each chunk is read at most once and only if it may hold
+    a requested address, and the values are scattered back into the original order.
+    Missing and null addresses give null values.
+    """
+    addresses = addresses.cast(pl.Int64)
+    order = addresses.arg_sort(nulls_last=True)
+    requested = addresses.gather(order).slice(
+        0, len(addresses) - addresses.null_count()
+    )
+    schema = pl.Schema({column: MEMORY_SCHEMA[column] for column in columns})
+
+    values = []
+    cursor = 0
+    while cursor < len(requested):
+        index = memory.last.search_sorted(requested[cursor], side="left")
+        if index == len(memory.files):
+            break
+        end = requested.search_sorted(memory.last[index], side="right")
+        chunk_requested = requested.slice(cursor, end - cursor)
+        cursor = end
+        if chunk_requested[-1] < memory.first[index]:
+            # All in the gap before this chunk
+            values.append(pl.DataFrame(schema=schema).clear(len(chunk_requested)))
+            continue
+        chunk = memory.chunk(index)
+        chunk_addresses = chunk.get_column(_COL_ADDRESS).cast(pl.Int64)
+        positions = chunk_addresses.search_sorted(chunk_requested, side="left")
+        values.append(
+            chunk.select(
+                pl.when(chunk_addresses.gather(positions) == chunk_requested).then(
+                    pl.col(columns).gather(positions)
+                )
+            )
+        )
+
+    values.append(pl.DataFrame(schema=schema).clear(len(addresses) - cursor))
+    return pl.concat(values).select(pl.all().gather(order.arg_sort()))
+
+
+def gather_memory(
+    frame: pl.DataFrame,
+    memory: ChunkedMemory,
+    addresses: dict[str, pl.Expr],
+    columns: Sequence[str] = (_COL_VALUE,),
+) -> pl.DataFrame:
+    """Add the memory `columns` at each `addresses` entry, all read in a single
+    `merge_memory` pass.
 
-    return pl.concat(chunk_dfs)
+    The added columns are named after the entry, suffixed by the memory column when
+    several are read.
+    """
+    values = merge_memory(
+        pl.concat(
+            [
+                frame.select(address.cast(pl.Int64).alias(_COL_ADDRESS)).to_series()
+                for address in addresses.values()
+            ]
+        ),
+        memory,
+        columns,
+    )
+    return frame.with_columns(
+        values.get_column(column)
+        .slice(i * frame.height, frame.height)
+        .alias(name if len(columns) == 1 else f"{name}_{column}")
+        for i, name in enumerate(addresses)
+        for column in columns
+    )
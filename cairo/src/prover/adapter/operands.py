@@ -17,6 +17,7 @@ _COL_OP0 = "op0"
 _COL_OP1_BASE = "op1_base"
 _COL_OP1_ADDR = "op1_addr"
 _COL_OP1 = "op1"
+_COL_OP1_DOUBLE_DEREF = "is_double_deref"
 _COL_DST_BASE = "dst_base"
 _COL_DST_ADDR = "dst_addr"
 _COL_DST = "dst"
@@ -24,18 +25,19 @@ _COL_DST = "dst"
 OP0_BASE = pl.when(OP0_BASE_FP).then(FP).otherwise(AP).alias(_COL_OP0_BASE)
 OP0_ADDR = (OP0_BASE + OFFSET1).alias(_COL_OP0_ADDR)
 OP0 = pl.col(_COL_OP0)
-OP1_BASE = (
-    pl.when(OP1_BASE_FP)
-    .then(FP)
-    .when(OP1_BASE_AP)
-    .then(AP)
-    .when(OP1_IMM)
-    .then(PC)
-    .otherwise(OP0)
-    .cast(pl.UInt32)
-    .alias(_COL_OP1_BASE)
+# Double deref instructions use op0 as op1 base, so op1 can only be fetched after op0
+OP1_DOUBLE_DEREF = (
+    (OP1_IMM | OP1_BASE_FP | OP1_BASE_AP).not_().alias(_COL_OP1_DOUBLE_DEREF)
 )
+_op1_base_direct = (
+    pl.when(OP1_BASE_FP).then(FP).when(OP1_BASE_AP).then(AP).when(OP1_IMM).then(PC)
+)
+OP1_BASE = _op1_base_direct.otherwise(OP0).cast(pl.UInt32).alias(_COL_OP1_BASE)
 OP1_ADDR = (OP1_BASE + OFFSET2).alias(_COL_OP1_ADDR)
+# Null for double deref instructions, does not depend on op0
+OP1_ADDR_DIRECT = (_op1_base_direct.otherwise(None).cast(pl.UInt32) + OFFSET2).alias(
+    _COL_OP1_ADDR
+)
 OP1 = pl.col(_COL_OP1)
 DST_BASE = pl.when(DST_BASE_FP).then(FP).otherwise(AP).alias(_COL_DST_BASE)
 DST_ADDR = (DST_BASE + OFFSET0).alias(_COL_DST_ADDR)
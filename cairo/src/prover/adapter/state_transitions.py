@@ -0,0 +1,144 @@
+import polars as pl
+from prover.adapter.instruction import _COL_ENCODED_INSTRUCTION
+from prover.adapter.memory import (
+    _COL_ADDRESS,
+    _COL_VALUE,
+    ChunkedMemory,
+    gather_memory,
+)
+from prover.adapter.opcodes import _COL_OPCODE, JNZ_OPCODE, JNZ_OPCODE_TAKEN, OPCODE
+from prover.adapter.operands import (
+    _COL_DST,
+    _COL_DST_ADDR,
+    _COL_OP0,
+    _COL_OP0_ADDR,
+    _COL_OP1,
+    _COL_OP1_ADDR,
+    DST_ADDR,
+    OP0_ADDR,
+    OP1_ADDR,
+    OP1_ADDR_DIRECT,
+    OP1_DOUBLE_DEREF,
+)
+from prover.adapter.trace import _COL_AP, _COL_FP, _COL_PC
+
+STATE_TRANSITIONS_COLUMNS = [
+    _COL_AP,
+    _COL_FP,
+    _COL_PC,
+    _COL_ENCODED_INSTRUCTION,
+    _COL_OPCODE,
+    _COL_OP0_ADDR,
+    _COL_OP0,
+    _COL_OP1_ADDR,
+    _COL_OP1,
+    _COL_DST_ADDR,
+    _COL_DST,
+]
+
+_COL_ROW = "_row"
+_SUFFIX_DOUBLE_DEREF = "_double_deref"
+
+# Update jnz opcode (taken or not) based on dst
+JNZ_TAKEN = (
+    pl.when(pl.col(_COL_OPCODE).eq(JNZ_OPCODE) & pl.col(_COL_DST).eq(0))
+    .then(JNZ_OPCODE_TAKEN)
+    .otherwise(pl.col(_COL_OPCODE))
+    .cast(pl.Categorical)
+    .alias(_COL_OPCODE)
+)
+
+
+def decode_instructions(trace: pl.LazyFrame, memory: ChunkedMemory) -> pl.DataFrame:
+    """Encoded instruction and opcode of each distinct pc of the trace."""
+    return gather_memory(
+        trace.select(pl.col(_COL_PC).unique()).collect(),
+        memory,
+        {_COL_ENCODED_INSTRUCTION: pl.col(_COL_PC)},
+    ).with_columns(OPCODE)
+
+
+def _join_memory(
+    frame: pl.LazyFrame, memory: pl.LazyFrame, address: str, value: str
+) -> pl.LazyFrame:
+    return frame.join(
+        memory,
+        left_on=address,
+        right_on=_COL_ADDRESS,
+        how="left",
+        maintain_order="left",
+    ).rename({_COL_VALUE: value})
+
+
+def _with_double_deref_op1(
+    state_transitions: pl.LazyFrame, double_deref: pl.LazyFrame
+) -> pl.LazyFrame:
+    """Fill op1 of the double deref rows, keyed by row index, and set jnz taken."""
+    return (
+        state_transitions.join(
+            double_deref,
+            on=_COL_ROW,
+            how="left",
+            maintain_order="left",
+            suffix=_SUFFIX_DOUBLE_DEREF,
+        )
+        .with_columns(
+            pl.coalesce(_COL_OP1_ADDR, f"{_COL_OP1_ADDR}{_SUFFIX_DOUBLE_DEREF}"),
+            pl.coalesce(_COL_OP1, f"{_COL_OP1}{_SUFFIX_DOUBLE_DEREF}"),
+        )
+        .with_columns(JNZ_TAKEN)
+        .select(STATE_TRANSITIONS_COLUMNS)
+    )
+
+
+def resolve_state_transitions(
+    trace: pl.LazyFrame, memory: pl.LazyFrame, instructions: pl.LazyFrame
+) -> pl.LazyFrame:
+    """Resolve operands in dependency stages: instruction, direct operands, then
+    op1 of the double deref rows only."""
+    state_transitions = (
+        # Fetch instruction
+        trace.join(instructions, on=_COL_PC, how="left", maintain_order="left")
+        .with_row_index(_COL_ROW)
+        # Fetch operands whose address only depends on the registers
+        .with_columns(OP0_ADDR, DST_ADDR, OP1_ADDR_DIRECT)
+        .pipe(_join_memory, memory, _COL_OP0_ADDR, _COL_OP0)
+        .pipe(_join_memory, memory, _COL_DST_ADDR, _COL_DST)
+        .pipe(_join_memory, memory, _COL_OP1_ADDR, _COL_OP1)
+    )
+    # Fetch op1 of double deref rows, based on op0
+    double_deref = (
+        state_transitions.filter(OP1_DOUBLE_DEREF)
+        .select(_COL_ROW, OP1_ADDR)
+        .pipe(_join_memory, memory, _COL_OP1_ADDR, _COL_OP1)
+    )
+    return _with_double_deref_op1(state_transitions, double_deref)
+
+
+def resolve_state_transitions_merge(
+    trace: pl.LazyFrame, memory: ChunkedMemory, instructions: pl.LazyFrame
+) -> pl.DataFrame:
+    """Same as `resolve_state_transitions`, with operands read by `merge_memory`, so
+    that the memory is never fully loaded in RAM."""
+    # Direct operands in a single pass
+    state_transitions = gather_memory(
+        trace.join(instructions, on=_COL_PC, how="left", maintain_order="left")
+        .with_row_index(_COL_ROW)
+        .with_columns(OP0_ADDR, DST_ADDR, OP1_ADDR_DIRECT)
+        .collect(),
+        memory,
+        {
+            _COL_OP0: pl.col(_COL_OP0_ADDR),
+            _COL_DST: pl.col(_COL_DST_ADDR),
+            _COL_OP1: pl.col(_COL_OP1_ADDR),
+        },
+    )
+    # Second, smaller pass for op1 of double deref rows
+    double_deref = gather_memory(
+        state_transitions.filter(OP1_DOUBLE_DEREF).select(_COL_ROW, OP1_ADDR),
+        memory,
+        {_COL_OP1: pl.col(_COL_OP1_ADDR)},
+    )
+    return _with_double_deref_op1(
+        state_transitions.lazy(), double_deref.lazy()
+    ).collect()
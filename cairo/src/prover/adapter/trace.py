@@ -4,6 +4,7 @@ from pathlib import Path
 
 import polars as pl
 from loguru import logger
+from prover.instrumentation import INSTRUMENTATION
 
 _COL_AP = "ap"
 _COL_FP = "fp"
@@ -38,31 +39,34 @@ def read_trace(file_path: Path) -> pl.LazyFrame:
             if not chunk:
                 break
 
-            # Process records within the chunk
-            chunk_ap = []
-            chunk_fp = []
-            chunk_pc = []
-            for i in range(0, len(chunk), record_size):
-                # Ensure we don't read past the end of a partial chunk
-                if i + record_size > len(chunk):
-                    continue  # Or handle partial record if necessary
-
-                unpacked_data = struct.unpack(
-                    unpack_format_string, chunk[i : i + record_size]
-                )
-                ap, fp, pc = unpacked_data
-
-                chunk_ap.append(ap)
-                chunk_fp.append(fp)
-                chunk_pc.append(pc)
-
-            # Create a DataFrame for this chunk
-            if chunk_ap:  # Avoid creating empty DataFrames
-                chunk_df = pl.DataFrame(
-                    {"ap": chunk_ap, "fp": chunk_fp, "pc": chunk_pc},
-                    schema=TRACE_SCHEMA,
-                )
-                chunk_dfs.append(chunk_df.lazy())  # Append the lazy frame
+            with INSTRUMENTATION.stage("read_trace", chunk=iteration) as record:
+                # Process records within the chunk
+                chunk_ap = []
+                chunk_fp = []
+                chunk_pc = []
+                for i in range(0, len(chunk), record_size):
+                    # Ensure we don't read past the end of a partial chunk
+                    if i + record_size > len(chunk):
+                        continue  # Or handle partial record if necessary
+
+                    unpacked_data = struct.unpack(
+                        unpack_format_string, chunk[i : i + record_size]
+                    )
+                    ap, fp, pc = unpacked_data
+
+                    chunk_ap.append(ap)
+                    chunk_fp.append(fp)
+                    chunk_pc.append(pc)
+
+                # Create a DataFrame for this chunk
+                if chunk_ap:  # Avoid creating empty DataFrames
+                    chunk_df = pl.DataFrame(
+                        {"ap": chunk_ap, "fp": chunk_fp, "pc": chunk_pc},
+                        schema=TRACE_SCHEMA,
+                    )
+                    chunk_dfs.append(chunk_df.lazy())  # Append the lazy frame
+                record["bytes_read"] = len(chunk)
+                record["rows"] = len(chunk_ap)
 
             iteration += 1
 
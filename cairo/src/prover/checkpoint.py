@@ -0,0 +1,234 @@
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import polars as pl
+from loguru import logger
+from prover.instrumentation import INSTRUMENTATION
+
+MANIFEST_FILE = "manifest.json"
+
+_PACKAGE_PATH = Path(__file__).parent
+
+
+def module_sources(modules: Iterable[str]) -> set[Path]:
+    """Source files of `modules` and of the prover modules they import, transitively."""
+    sources = set()
+    pending = list(modules)
+    while pending:
+        source = Path(importlib.util.find_spec(pending.pop()).origin)
+        if source in sources:
+            continue
+        sources.add(source)
+        for node in ast.walk(ast.parse(source.read_text())):
+            if isinstance(node, ast.ImportFrom) and node.level == 0:
+                names = [node.module]
+            elif isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            else:
+                continue
+            pending.extend(
+                name
+                for name in names
+                if name == __package__ or name.startswith(f"{__package__}.")
+            )
+    return sources
+
+
+def code_version(modules: Iterable[str] | None = None) -> str:
+    """Hash of the sources of `modules`, or of the whole prover by default, so that a
+    change in the code a stage runs invalidates its checkpoint."""
+    digest = hashlib.sha256()
+    sources = (
+        _PACKAGE_PATH.rglob("*.py") if modules is None else module_sources(modules)
+    )
+    for source in sorted(sources):
+        digest.update(str(source.relative_to(_PACKAGE_PATH)).encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path: Path) -> str:
+    """Cheap fingerprint of an input file, without reading it."""
+    stat = os.stat(file_path)
+    return f"{file_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _write(frame: pl.DataFrame | pl.LazyFrame, file_path: Path) -> None:
+    tmp_path = file_path.with_suffix(".tmp")
+    if isinstance(frame, pl.LazyFrame):
+        frame.sink_ipc(tmp_path)
+    else:
+        frame.write_ipc(tmp_path)
+    os.replace(tmp_path, file_path)
+
+
+def _instrumented_write(
+    name: str,
+    compute: Callable[[], pl.DataFrame | pl.LazyFrame],
+    file_path: Path,
+    **labels: int,
+) -> None:
+    """Compute and write a stage output, timed; its plan is captured afterwards so
+    that profiling is not counted in the stage duration."""
+    with INSTRUMENTATION.stage(name, **labels) as record:
+        frame = compute()
+        _write(frame, file_path)
+        if INSTRUMENTATION.enabled:
+            record["rows"] = pl.scan_ipc(file_path).select(pl.len()).collect().item()
+            record["bytes_written"] = file_path.stat().st_size
+    if isinstance(frame, pl.LazyFrame):
+        INSTRUMENTATION.plan(name, frame, **labels)
+
+
+class Run:
+    """Run directory saving each pipeline stage output as Arrow IPC, with a manifest.
+
+    A stage is skipped when its key, derived from the version of the modules it runs
+    (`code`, the whole prover if not given), its own input files and the keys of the
+    stages it depends on, matches the one in the manifest.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.path / MANIFEST_FILE
+        self.manifest = (
+            json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        )
+        self.keys: dict[str, str] = {}
+
+    def _key(
+        self,
+        inputs: Iterable[Path],
+        depends_on: Iterable[str],
+        code: Iterable[str] | None,
+    ) -> str:
+        return hashlib.sha256(
+            "\n".join(
+                [
+                    code_version(code),
+                    *(file_fingerprint(path) for path in inputs),
+                    *(self.keys[name] for name in depends_on),
+                ]
+            ).encode()
+        ).hexdigest()
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.path / f"{MANIFEST_FILE}.tmp"
+        tmp_path.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(tmp_path, self.path / MANIFEST_FILE)
+
+    def stage(
+        self,
+        name: str,
+        compute: Callable[[], pl.DataFrame | pl.LazyFrame],
+        inputs: Iterable[Path] = (),
+        depends_on: Iterable[str] = (),
+        code: Iterable[str] | None = None,
+    ) -> pl.LazyFrame:
+        """Output of `compute`, loaded from the run directory when up to date."""
+        key = self.keys[name] = self._key(inputs, depends_on, code)
+        file_path = self.path / f"{name}.arrow"
+        entry = self.manifest.get(name)
+        if entry is not None and entry["key"] == key and file_path.exists():
+            logger.info(f"Stage {name} is up to date, skipping")
+            return pl.scan_ipc(file_path)
+
+        logger.info(f"Running stage {name}")
+        _instrumented_write(name, compute, file_path)
+        self.manifest[name] = {"key": key, "file": file_path.name}
+        self._save_manifest()
+        return pl.scan_ipc(file_path)
+
+    def chunks(
+        self,
+        name: str,
+        compute: Callable[[], Iterable[pl.DataFrame]],
+        inputs: Iterable[Path] = (),
+        depends_on: Iterable[str] = (),
+        code: Iterable[str] | None = None,
+    ) -> list[Path]:
+        """Files of the frames yielded by `compute`, written one at a time so that the
+        output is never fully in RAM. Rewritten as a whole when out of date."""
+        key = self.keys[name] = self._key(inputs, depends_on, code)
+        directory = self.path / name
+        entry = self.manifest.get(name)
+        if entry is not None and entry["key"] == key:
+            files = [
+                directory / f"{chunk:06d}.arrow" for chunk in range(entry["chunks"])
+            ]
+            if all(file_path.exists() for file_path in files):
+                logger.info(f"Stage {name} is up to date, skipping")
+                return files
+
+        logger.info(f"Running stage {name}")
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        files = []
+        for chunk, frame in enumerate(compute()):
+            file_path = directory / f"{chunk:06d}.arrow"
+            _instrumented_write(name, lambda frame=frame: frame, file_path, chunk=chunk)
+            files.append(file_path)
+        self.manifest[name] = {"key": key, "chunks": len(files)}
+        self._save_manifest()
+        return files
+
+    def windows(
+        self,
+        name: str,
+        length: int,
+        window_size: int,
+        compute: Callable[[int, int], pl.DataFrame | pl.LazyFrame],
+        inputs: Iterable[Path] = (),
+        depends_on: Iterable[str] = (),
+        code: Iterable[str] | None = None,
+    ) -> pl.LazyFrame:
+        """Concatenated outputs of `compute(offset, window_size)` over `length` rows.
+
+        Finished windows are kept across runs, so a restart resumes from the last one.
+        """
+        key = self.keys[name] = self._key(inputs, depends_on, code)
+        directory = self.path / name
+        entry = self.manifest.get(name)
+        if entry is None or entry["key"] != key or entry["window_size"] != window_size:
+            shutil.rmtree(directory, ignore_errors=True)
+            entry = {"key": key, "window_size": window_size, "windows": 0}
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # An empty input still gets one, empty, window, so that the output has a schema
+        n_windows = max(1, -(-length // window_size))
+        files = [directory / f"{window:06d}.arrow" for window in range(n_windows)]
+        # Finished windows whose file is gone are recomputed
+        entry["windows"] = next(
+            (
+                window
+                for window in range(min(entry["windows"], n_windows))
+                if not files[window].exists()
+            ),
+            entry["windows"],
+        )
+        if 0 < entry["windows"] < n_windows:
+            logger.info(
+                f"Stage {name}: resuming at window {entry['windows']}/{n_windows}"
+            )
+        for window in range(entry["windows"], n_windows):
+            logger.info(f"Stage {name}: processing window {window}/{n_windows}")
+            _instrumented_write(
+                name,
+                lambda window=window: compute(window * window_size, window_size),
+                files[window],
+                window=window,
+            )
+            entry["windows"] = window + 1
+            self.manifest[name] = entry
+            self._save_manifest()
+
+        self.manifest[name] = entry
+        self._save_manifest()
+        return pl.scan_ipc(files)
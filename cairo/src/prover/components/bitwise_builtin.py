@@ -0,0 +1,27 @@
+from prover.adapter.builtins import INSTANCE, cell_words
+from prover.adapter.memory import WORD_COLUMNS
+
+_COL_X = "x"
+_COL_Y = "y"
+_COL_X_AND_Y = "x_and_y"
+_COL_X_XOR_Y = "x_xor_y"
+_COL_X_OR_Y = "x_or_y"
+
+# Inputs are up to 251 bits, so everything is word by word
+X = cell_words(0, _COL_X)
+Y = cell_words(1, _COL_Y)
+# Outputs are deduced from the inputs since they are only in memory if read by the program
+X_AND_Y = [
+    (x & y).alias(f"{_COL_X_AND_Y}_{column}")
+    for x, y, column in zip(X, Y, WORD_COLUMNS, strict=True)
+]
+X_XOR_Y = [
+    (x ^ y).alias(f"{_COL_X_XOR_Y}_{column}")
+    for x, y, column in zip(X, Y, WORD_COLUMNS, strict=True)
+]
+X_OR_Y = [
+    (x | y).alias(f"{_COL_X_OR_Y}_{column}")
+    for x, y, column in zip(X, Y, WORD_COLUMNS, strict=True)
+]
+
+BITWISE_BUILTIN = [INSTANCE, *X, *Y, *X_AND_Y, *X_XOR_Y, *X_OR_Y]
@@ -0,0 +1,74 @@
+import polars as pl
+from prover.adapter.instruction import (
+    AP_UPDATE_ADD_1,
+    DST_BASE_FP,
+    OFFSET0,
+    OFFSET1,
+    OFFSET2,
+    OP0_BASE_FP,
+    OP1_BASE_AP,
+    OP1_BASE_FP,
+    OPCODE_EXTENSION,
+)
+from prover.adapter.memory import ChunkedMemory, gather_memory
+from prover.adapter.opcodes import BLAKE_FINALIZE_OPCODE_EXTENSION
+from prover.adapter.operands import DST, DST_BASE, OP0, OP0_BASE, OP1, OP1_BASE
+from prover.adapter.trace import AP, FP, PC
+
+_COL_FINALIZE = "finalize"
+_COL_COUNTER = "counter"
+_COL_STATE = "state"
+_COL_MESSAGE = "message"
+_COL_NEW_STATE = "new_state"
+
+STATE_SIZE = 8
+MESSAGE_SIZE = 16
+
+FINALIZE = OPCODE_EXTENSION.eq(BLAKE_FINALIZE_OPCODE_EXTENSION).alias(_COL_FINALIZE)
+# The counter is the dst operand, the new state is written at ap
+COUNTER = DST.alias(_COL_COUNTER)
+STATE = [pl.col(f"{_COL_STATE}_{i}") for i in range(STATE_SIZE)]
+MESSAGE = [pl.col(f"{_COL_MESSAGE}_{i}") for i in range(MESSAGE_SIZE)]
+NEW_STATE = [pl.col(f"{_COL_NEW_STATE}_{i}") for i in range(STATE_SIZE)]
+
+
+def gather_blake_memory(
+    state_transitions: pl.DataFrame, memory: ChunkedMemory
+) -> pl.DataFrame:
+    """Fetch the state, message and new state of all blake steps, in a single pass
+    over the memory."""
+    return gather_memory(
+        state_transitions,
+        memory,
+        {
+            **{f"{_COL_STATE}_{i}": OP0 + i for i in range(STATE_SIZE)},
+            **{f"{_COL_MESSAGE}_{i}": OP1 + i for i in range(MESSAGE_SIZE)},
+            **{f"{_COL_NEW_STATE}_{i}": AP + i for i in range(STATE_SIZE)},
+        },
+    )
+
+
+BLAKE_COMPRESS_OPCODE = [
+    PC,
+    AP,
+    FP,
+    OFFSET0,
+    OFFSET1,
+    OFFSET2,
+    DST_BASE_FP,
+    OP0_BASE_FP,
+    OP1_BASE_FP,
+    OP1_BASE_AP,
+    AP_UPDATE_ADD_1,
+    FINALIZE,
+    DST_BASE,
+    OP0_BASE,
+    OP1_BASE,
+    DST,
+    OP0,
+    OP1,
+    COUNTER,
+    *STATE,
+    *MESSAGE,
+    *NEW_STATE,
+]
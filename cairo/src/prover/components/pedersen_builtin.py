@@ -0,0 +1,11 @@
+from prover.adapter.builtins import INSTANCE, cell_words
+
+_COL_X = "x"
+_COL_Y = "y"
+_COL_HASH = "hash"
+
+X = cell_words(0, _COL_X)
+Y = cell_words(1, _COL_Y)
+HASH = cell_words(2, _COL_HASH)
+
+PEDERSEN_BUILTIN = [INSTANCE, *X, *Y, *HASH]
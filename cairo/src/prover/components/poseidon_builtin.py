@@ -0,0 +1,19 @@
+from prover.adapter.builtins import INSTANCE, cell_words
+
+_COL_INPUT = "input"
+_COL_OUTPUT = "output"
+
+POSEIDON_STATE_SIZE = 3
+
+INPUTS = [
+    word
+    for i in range(POSEIDON_STATE_SIZE)
+    for word in cell_words(i, f"{_COL_INPUT}_{i}")
+]
+OUTPUTS = [
+    word
+    for i in range(POSEIDON_STATE_SIZE)
+    for word in cell_words(POSEIDON_STATE_SIZE + i, f"{_COL_OUTPUT}_{i}")
+]
+
+POSEIDON_BUILTIN = [INSTANCE, *INPUTS, *OUTPUTS]
@@ -0,0 +1,89 @@
+import polars as pl
+from prover.adapter.instruction import (
+    AP_UPDATE_ADD_1,
+    DST_BASE_FP,
+    OFFSET0,
+    OFFSET1,
+    OFFSET2,
+    OP0_BASE_FP,
+    OP1_BASE_AP,
+    OP1_BASE_FP,
+    OP1_IMM,
+    RES_ADD,
+)
+from prover.adapter.memory import (
+    _COL_WORD,
+    FELT_WORDS,
+    WORD_COLUMNS,
+    ChunkedMemory,
+    felt_bits,
+    gather_memory,
+)
+from prover.adapter.operands import (
+    _COL_DST,
+    _COL_DST_ADDR,
+    _COL_OP0,
+    _COL_OP0_ADDR,
+    _COL_OP1,
+    _COL_OP1_ADDR,
+    DST_BASE,
+    OP0_BASE,
+    OP1_BASE,
+)
+from prover.adapter.trace import AP, FP, PC
+
+# A QM31 is packed in a felt as 4 M31 limbs, each one in a 36 bits slot
+QM31_LIMBS = 4
+QM31_LIMB_SLOT_BITS = 36
+M31_BITS = 31
+
+
+def gather_qm31_memory(
+    state_transitions: pl.DataFrame, memory: ChunkedMemory
+) -> pl.DataFrame:
+    """Fetch the words of the dst, op0 and op1 felts, the packed QM31 do not fit in
+    the 128 bits operand values."""
+    return gather_memory(
+        state_transitions,
+        memory,
+        {
+            _COL_DST: pl.col(_COL_DST_ADDR),
+            _COL_OP0: pl.col(_COL_OP0_ADDR),
+            _COL_OP1: pl.col(_COL_OP1_ADDR),
+        },
+        WORD_COLUMNS,
+    )
+
+
+def qm31_limbs(name: str) -> list[pl.Expr]:
+    """Unpack the 4 M31 limbs of a packed QM31 from the `name` words."""
+    words = [pl.col(f"{name}_{_COL_WORD}_{i}") for i in range(FELT_WORDS)]
+    return [
+        felt_bits(words, QM31_LIMB_SLOT_BITS * i, M31_BITS)
+        .cast(pl.UInt32)
+        .alias(f"{name}_{i}")
+        for i in range(QM31_LIMBS)
+    ]
+
+
+QM_31_ADD_MUL_OPCODE = [
+    PC,
+    AP,
+    FP,
+    OFFSET0,
+    OFFSET1,
+    OFFSET2,
+    DST_BASE_FP,
+    OP0_BASE_FP,
+    OP1_IMM,
+    OP1_BASE_FP,
+    OP1_BASE_AP,
+    RES_ADD,
+    AP_UPDATE_ADD_1,
+    DST_BASE,
+    OP0_BASE,
+    OP1_BASE,
+    *qm31_limbs(_COL_DST),
+    *qm31_limbs(_COL_OP0),
+    *qm31_limbs(_COL_OP1),
+]
@@ -0,0 +1,20 @@
+import polars as pl
+from prover.adapter.builtins import INSTANCE, cell_words
+from prover.adapter.memory import felt_bits
+
+_COL_VALUE = "value"
+_COL_LIMB = "limb"
+
+RANGE_CHECK_LIMB_BITS = 16
+RANGE_CHECK_LIMBS = 128 // RANGE_CHECK_LIMB_BITS
+
+# Words rather than the 128 bits signed value, which is negative from 2**127
+VALUE = cell_words(0, _COL_VALUE)
+LIMBS = [
+    felt_bits(VALUE, RANGE_CHECK_LIMB_BITS * i, RANGE_CHECK_LIMB_BITS)
+    .cast(pl.UInt16)
+    .alias(f"{_COL_LIMB}_{i}")
+    for i in range(RANGE_CHECK_LIMBS)
+]
+
+RANGE_CHECK_BUILTIN_BITS_128 = [INSTANCE, *VALUE, *LIMBS]
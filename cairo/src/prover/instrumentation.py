@@ -0,0 +1,145 @@
+import atexit
+import json
+import os
+import resource
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Protocol
+
+import polars as pl
+from loguru import logger
+
+_METRIC_PREFIX = "prover"
+
+
+class Sink(Protocol):
+    def emit(self, record: dict[str, Any]) -> None: ...
+
+
+class LogSink:
+    def emit(self, record: dict[str, Any]) -> None:
+        logger.info(" ".join(f"{key}={value}" for key, value in record.items()))
+
+
+class JsonLinesSink:
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+
+    def emit(self, record: dict[str, Any]) -> None:
+        with open(self.file_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class PrometheusSink:
+    """Prometheus text file with the numeric metrics of each stage, summed over its
+    windows, chunks and plan nodes (`max_rss_bytes` is the maximum).
+
+    The file is written when a record of another stage comes in and at exit, the
+    per-window and per-node details are left to the other sinks.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.samples: dict[str, float] = {}
+        self.stage: str | None = None
+        atexit.register(self.flush)
+
+    def emit(self, record: dict[str, Any]) -> None:
+        if self.stage is not None and record["stage"] != self.stage:
+            self.flush()
+        self.stage = record["stage"]
+        for key, value in record.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f'{_METRIC_PREFIX}_{key}{{stage="{record["stage"]}"}}'
+                previous = self.samples.get(name, 0)
+                self.samples[name] = (
+                    max(previous, value) if key == "max_rss_bytes" else previous + value
+                )
+
+    def flush(self) -> None:
+        if not self.samples:
+            return
+        tmp_path = self.file_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            "".join(f"{name} {value}\n" for name, value in self.samples.items())
+        )
+        os.replace(tmp_path, self.file_path)
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Instrumentation:
+    """Opt-in timings, counters and query plans, disabled when no sink is set."""
+
+    def __init__(self, sink: Sink | None = None, profile: bool = False):
+        self.sink = sink
+        self.profile = profile
+
+    def configure(self, sink: Sink | None, profile: bool = False) -> None:
+        self.sink = sink
+        self.profile = profile
+
+    def configure_from_env(self) -> None:
+        """Configure from `INSTRUMENTATION` (`log`, `jsonl:<path>` or `prometheus:<path>`)
+        and `INSTRUMENTATION_PROFILE`."""
+        kind, _, path = os.environ.get("INSTRUMENTATION", "").partition(":")
+        sinks = {
+            "": lambda: None,
+            "log": LogSink,
+            "jsonl": lambda: JsonLinesSink(Path(path)),
+            "prometheus": lambda: PrometheusSink(Path(path)),
+        }
+        if kind not in sinks:
+            raise ValueError(f"Unknown instrumentation sink: {kind}")
+        self.configure(
+            sinks[kind](), profile=bool(os.environ.get("INSTRUMENTATION_PROFILE"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    @contextmanager
+    def stage(self, name: str, **labels: Any) -> Iterator[dict[str, Any]]:
+        """Time the block; the caller may add counters (rows, bytes_read...) to the yielded record."""
+        record: dict[str, Any] = {"stage": name, "labels": labels}
+        if not self.enabled:
+            yield record
+            return
+        start = time.perf_counter()
+        yield record
+        record["duration_seconds"] = time.perf_counter() - start
+        record["max_rss_bytes"] = _max_rss_bytes()
+        self.sink.emit(record)
+
+    def plan(self, name: str, frame: pl.LazyFrame, **labels: Any) -> None:
+        """Capture the optimized plan of a query, and its profile if enabled.
+
+        Profiling runs the query, on top of its actual execution.
+        """
+        if not self.enabled:
+            return
+        self.sink.emit({"stage": name, "labels": labels, "plan": frame.explain()})
+        if not self.profile:
+            return
+        try:
+            _, timings = frame.profile()
+        except pl.exceptions.ComputeError:
+            # Plans without any operation to time (e.g. in-memory frames)
+            return
+        for node, start, end in timings.iter_rows():
+            self.sink.emit(
+                {
+                    "stage": name,
+                    "labels": {**labels, "node": node},
+                    "node_duration_seconds": (end - start) / 1e6,
+                }
+            )
+
+
+INSTRUMENTATION = Instrumentation()
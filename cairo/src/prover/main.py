@@ -4,73 +4,171 @@ from pathlib import Path
 
 import polars as pl
 from dotenv import load_dotenv
-from prover.adapter.instruction import _COL_ENCODED_INSTRUCTION
-from prover.adapter.memory import _COL_ADDRESS, _COL_VALUE, read_memory
+from prover.adapter.builtins import (
+    BITWISE_SEGMENT,
+    PEDERSEN_SEGMENT,
+    POSEIDON_SEGMENT,
+    RANGE_CHECK_SEGMENT,
+    read_builtins,
+    read_segments,
+)
+from prover.adapter.memory import ChunkedMemory, memory_index, read_memory_chunks
 from prover.adapter.opcodes import (
     _COL_OPCODE,
     ADD_OPCODE,
-    JNZ_OPCODE,
-    JNZ_OPCODE_TAKEN,
-    OPCODE,
-)
-from prover.adapter.operands import (
-    _COL_DST,
-    _COL_DST_ADDR,
-    _COL_OP0,
-    _COL_OP0_ADDR,
-    _COL_OP1,
-    _COL_OP1_ADDR,
-    DST_ADDR,
-    OP0_ADDR,
-    OP1_ADDR,
-)
-from prover.adapter.trace import _COL_PC, read_trace
+    BLAKE_OPCODE,
+    QM31_ADD_MUL_OPCODE,
+)
+from prover.adapter.state_transitions import (
+    decode_instructions,
+    resolve_state_transitions,
+    resolve_state_transitions_merge,
+)
+from prover.adapter.trace import read_trace
+from prover.checkpoint import Run
 from prover.components.add_opcode_small import ADD_SMALL_OPCODE
+from prover.components.bitwise_builtin import BITWISE_BUILTIN
+from prover.components.blake_compress_opcode import (
+    BLAKE_COMPRESS_OPCODE,
+    gather_blake_memory,
+)
+from prover.components.pedersen_builtin import PEDERSEN_BUILTIN
+from prover.components.poseidon_builtin import POSEIDON_BUILTIN
+from prover.components.qm31_add_mul_opcode import (
+    QM_31_ADD_MUL_OPCODE,
+    gather_qm31_memory,
+)
+from prover.components.range_check_builtin_bits_128 import (
+    RANGE_CHECK_BUILTIN_BITS_128,
+)
+from prover.instrumentation import INSTRUMENTATION
 
 pl.enable_string_cache()
 load_dotenv()
+INSTRUMENTATION.configure_from_env()
 base_path = Path(os.environ["BASE_PATH"])
+run_path = Path(os.environ.get("RUN_PATH", base_path / "run"))
+window_size = int(os.environ.get("WINDOW_SIZE", 2**20))
+# "join" resolves operands with hash joins, "merge" with a sequential pass over the
+# address-sorted memory chunks, for memories larger than RAM
+memory_resolution = os.environ.get("MEMORY_RESOLUTION", "join")
+if memory_resolution not in ("join", "merge"):
+    raise ValueError(f"Unknown memory resolution: {memory_resolution}")
+memory_chunk_size = int(os.environ.get("MEMORY_CHUNK_SIZE", 2**20))
+
+memory_path = base_path / "memory.bin"
+trace_path = base_path / "trace.bin"
+public_input_path = base_path / "air_public_input.json"
+run = Run(run_path)
 
 
 # %% Read memory
-file_path = base_path / "memory.bin"
-memory = read_memory(file_path)
+memory_files = run.chunks(
+    "memory",
+    # The join resolution loads the whole memory anyway, so it accepts unsorted dumps
+    lambda: read_memory_chunks(
+        memory_path, memory_chunk_size, sort=memory_resolution == "join"
+    ),
+    inputs=[memory_path],
+    code=["prover.adapter.memory"],
+)
+memory = ChunkedMemory(
+    memory_files,
+    run.stage(
+        "memory_index",
+        lambda: memory_index(memory_files),
+        depends_on=["memory"],
+        code=["prover.adapter.memory"],
+    ).collect(),
+)
 
 # %% Read trace
-file_path = base_path / "trace.bin"
-trace = read_trace(file_path)
+trace = run.stage(
+    "trace",
+    lambda: read_trace(trace_path),
+    inputs=[trace_path],
+    code=["prover.adapter.trace"],
+)
+
+# %% Decode instructions
+instructions = run.stage(
+    "instructions",
+    lambda: decode_instructions(trace, memory),
+    depends_on=["trace", "memory_index"],
+    code=["prover.adapter.state_transitions"],
+)
 
 # %% Prover input
-state_transitions = (
-    # Join trace with memory to get encoded instruction and opcode
-    trace.join(memory, left_on=_COL_PC, right_on=_COL_ADDRESS, how="left")
-    .rename({_COL_VALUE: _COL_ENCODED_INSTRUCTION})
-    .with_columns(OPCODE)
-    # Add op0 to state transitions
-    .with_columns(OP0_ADDR)
-    .join(memory, left_on=_COL_OP0_ADDR, right_on=_COL_ADDRESS, how="left")
-    .rename({_COL_VALUE: _COL_OP0})
-    # Add op1 to state transitions
-    .with_columns(OP1_ADDR)
-    .join(memory, left_on=_COL_OP1_ADDR, right_on=_COL_ADDRESS, how="left")
-    .rename({_COL_VALUE: _COL_OP1})
-    # Add dst to state transitions
-    .with_columns(DST_ADDR)
-    .join(memory, left_on=_COL_DST_ADDR, right_on=_COL_ADDRESS, how="left")
-    .rename({_COL_VALUE: _COL_DST})
-    # Update jnz opcode (taken or not) based on dst
-    .with_columns(
-        pl.when(pl.col(_COL_OPCODE).eq(JNZ_OPCODE) & pl.col(_COL_DST).eq(0))
-        .then(JNZ_OPCODE_TAKEN)
-        .otherwise(pl.col(_COL_OPCODE))
-        .alias(_COL_OPCODE)
-    )
+state_transitions = run.windows(
+    "state_transitions",
+    trace.select(pl.len()).collect().item(),
+    window_size,
+    lambda offset, length: (
+        resolve_state_transitions_merge(
+            trace.slice(offset, length), memory, instructions
+        )
+        if memory_resolution == "merge"
+        else resolve_state_transitions(
+            trace.slice(offset, length), memory.lazy(), instructions
+        )
+    ),
+    depends_on=["trace", "memory_index", "instructions"],
+    code=["prover.adapter.state_transitions"],
 )
 
 # %% Witnesses
-add_small_witness = state_transitions.filter(pl.col(_COL_OPCODE).eq(ADD_OPCODE)).select(
-    ADD_SMALL_OPCODE
+add_small_witness = run.stage(
+    "add_opcode_small",
+    lambda: state_transitions.filter(pl.col(_COL_OPCODE).eq(ADD_OPCODE)).select(
+        ADD_SMALL_OPCODE
+    ),
+    depends_on=["state_transitions"],
+    code=["prover.adapter.opcodes", "prover.components.add_opcode_small"],
 )
+blake_witness = run.stage(
+    "blake_compress_opcode",
+    lambda: gather_blake_memory(
+        state_transitions.filter(pl.col(_COL_OPCODE).eq(BLAKE_OPCODE)).collect(),
+        memory,
+    ).select(BLAKE_COMPRESS_OPCODE),
+    depends_on=["state_transitions", "memory_index"],
+    code=["prover.adapter.opcodes", "prover.components.blake_compress_opcode"],
+)
+qm31_witness = run.stage(
+    "qm31_add_mul_opcode",
+    lambda: gather_qm31_memory(
+        state_transitions.filter(pl.col(_COL_OPCODE).eq(QM31_ADD_MUL_OPCODE)).collect(),
+        memory,
+    ).select(QM_31_ADD_MUL_OPCODE),
+    depends_on=["state_transitions", "memory_index"],
+    code=["prover.adapter.opcodes", "prover.components.qm31_add_mul_opcode"],
+)
+
+# %% Builtins
+segments = read_segments(public_input_path) if public_input_path.exists() else {}
+# Columns of each builtin component, and the module defining them
+builtin_components = {
+    RANGE_CHECK_SEGMENT: (
+        RANGE_CHECK_BUILTIN_BITS_128,
+        "prover.components.range_check_builtin_bits_128",
+    ),
+    BITWISE_SEGMENT: (BITWISE_BUILTIN, "prover.components.bitwise_builtin"),
+    POSEIDON_SEGMENT: (POSEIDON_BUILTIN, "prover.components.poseidon_builtin"),
+    PEDERSEN_SEGMENT: (PEDERSEN_BUILTIN, "prover.components.pedersen_builtin"),
+}
+builtin_witnesses = {
+    name: run.stage(
+        f"{name}_builtin",
+        lambda name=name: read_builtins(memory, {name: segments[name]})[name].select(
+            builtin_components[name][0]
+        ),
+        inputs=[public_input_path],
+        depends_on=["memory_index"],
+        code=["prover.adapter.builtins", builtin_components[name][1]],
+    )
+    for name in segments
+    if name in builtin_components
+}
 
 # %% Debug prints
 state_transitions.collect_schema()
@@ -0,0 +1,97 @@
+import struct
+
+import polars as pl
+import pytest
+from prover.adapter.memory import (
+    _COL_ADDRESS,
+    _COL_VALUE,
+    DEFAULT_PRIME,
+    WORD_COLUMNS,
+    felt_bits,
+    merge_memory,
+    read_memory_chunks,
+)
+
+ADDRESSES = [2, 3, 5, 8, 9, 10, 20, 21, 22, 40]
+# Negative felts spanning the 4 words, in an address-sorted memory with gaps
+FELTS = {address: DEFAULT_PRIME - 1 - 3**address for address in ADDRESSES}
+
+
+@pytest.fixture
+def memory(memory_frame):
+    return memory_frame(FELTS)
+
+
+@pytest.mark.parametrize("columns", [[_COL_VALUE], WORD_COLUMNS])
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 100])
+def test_merge_memory_matches_join(memory, chunked_memory, chunk_size, columns):
+    chunks = chunked_memory(memory, chunk_size)
+    # Unsorted, duplicated, missing (before, between and after chunks) and null
+    addresses = pl.Series(
+        [21, None, 0, 5, 6, 3, 100, 15, 2, 10, 5, None, 40, 23], dtype=pl.UInt32
+    )
+
+    joined = (
+        addresses.to_frame(_COL_ADDRESS)
+        .join(memory, on=_COL_ADDRESS, how="left", maintain_order="left")
+        .select(columns)
+    )
+
+    assert merge_memory(addresses, chunks, columns).equals(joined)
+
+
+def test_merge_memory_reads_needed_chunks_once(memory, chunked_memory, monkeypatch):
+    chunks = chunked_memory(memory, 2)
+    reads = []
+    chunk = chunks.chunk
+    monkeypatch.setattr(
+        chunks, "chunk", lambda index: reads.append(index) or chunk(index)
+    )
+
+    merge_memory(pl.Series([21, 20, 1, 45, 15], dtype=pl.UInt32), chunks)
+
+    # 1 lies before the first chunk and 45 after the last one, neither is read
+    assert reads == [3]
+
+
+def test_segment(memory, chunked_memory):
+    chunks = chunked_memory(memory, 3)
+
+    assert chunks.segment(4, 21).equals(
+        memory.filter(pl.col(_COL_ADDRESS).is_between(4, 21, closed="left"))
+    )
+    assert chunks.segment(11, 20).is_empty()
+
+
+@pytest.mark.parametrize(
+    "start, length", [(0, 31), (36, 31), (60, 8), (108, 31), (128, 64), (190, 61)]
+)
+def test_felt_bits(memory, start, length):
+    words = [pl.col(column) for column in WORD_COLUMNS]
+
+    bits = memory.select(felt_bits(words, start, length)).to_series()
+
+    assert bits.to_list() == [(felt >> start) % 2**length for felt in FELTS.values()]
+
+
+def test_read_memory_chunks_sort(memory, tmp_path):
+    file_path = tmp_path / "memory.bin"
+    # Not in address order across chunks of 4 records
+    addresses = [20, 21, 22, 40, 2, 3, 5, 8, 9, 10]
+    file_path.write_bytes(
+        b"".join(
+            struct.pack(
+                "<5Q",
+                address,
+                *(FELTS[address] >> (64 * i) & (2**64 - 1) for i in range(4)),
+            )
+            for address in addresses
+        )
+    )
+
+    with pytest.raises(ValueError, match="not sorted"):
+        list(read_memory_chunks(file_path, 4))
+    chunks = list(read_memory_chunks(file_path, 4, sort=True))
+
+    assert [chunk.height for chunk in chunks] == [4, 4, 2]
+    assert pl.concat(chunks).equals(memory)
@@ -0,0 +1,182 @@
+import polars as pl
+import pytest
+from prover.adapter.instruction import _COL_ENCODED_INSTRUCTION
+from prover.adapter.memory import _COL_ADDRESS, _COL_VALUE
+from prover.adapter.opcodes import _COL_OPCODE, JNZ_OPCODE, JNZ_OPCODE_TAKEN, OPCODE
+from prover.adapter.operands import (
+    _COL_DST,
+    _COL_DST_ADDR,
+    _COL_OP0,
+    _COL_OP0_ADDR,
+    _COL_OP1,
+    _COL_OP1_ADDR,
+    DST_ADDR,
+    OP0_ADDR,
+    OP1_ADDR,
+)
+from prover.adapter.state_transitions import (
+    STATE_TRANSITIONS_COLUMNS,
+    decode_instructions,
+    resolve_state_transitions,
+    resolve_state_transitions_merge,
+)
+from prover.adapter.trace import _COL_AP, _COL_FP, _COL_PC, TRACE_SCHEMA
+
+FLAGS = [
+    "dst_base_fp",
+    "op0_base_fp",
+    "op1_imm",
+    "op1_base_fp",
+    "op1_base_ap",
+    "res_add",
+    "res_mul",
+    "pc_update_jump",
+    "pc_update_jump_rel",
+    "pc_update_jnz",
+    "ap_update_add",
+    "ap_update_add_1",
+    "opcode_call",
+    "opcode_ret",
+    "opcode_assert_eq",
+]
+
+
+def encode(offset0: int, offset1: int, offset2: int, *flags: str) -> int:
+    offsets = sum(
+        (offset + 2**15) << (16 * i)
+        for i, offset in enumerate((offset0, offset1, offset2))
+    )
+    return offsets | sum(1 << (48 + FLAGS.index(flag)) for flag in flags)
+
+
+FP = 100
+FELTS = {
+    # [fp + 3] = [fp + 4] + [fp + 5]
+    1: encode(
+        3,
+        4,
+        5,
+        "dst_base_fp",
+        "op0_base_fp",
+        "op1_base_fp",
+        "res_add",
+        "opcode_assert_eq",
+    ),
+    # [fp] = [[fp + 6]]
+    2: encode(0, 6, 0, "dst_base_fp", "op0_base_fp", "opcode_assert_eq"),
+    # jmp rel 7 if [ap - 1] != 0
+    3: encode(-1, -1, 1, "op0_base_fp", "op1_imm", "pc_update_jnz"),
+    4: 7,
+    5: encode(
+        -2,
+        -1,
+        -1,
+        "dst_base_fp",
+        "op0_base_fp",
+        "op1_base_fp",
+        "pc_update_jump",
+        "opcode_ret",
+    ),
+    FP - 2: 10,
+    FP - 1: 20,
+    FP: 200,
+    FP + 3: 3,
+    FP + 4: 1,
+    FP + 5: 2,
+    FP + 6: 500,
+    500: 42,
+    # dst of the jnz steps, taken at ap = 150 only
+    149: 0,
+    159: 5,
+}
+TRACE = pl.DataFrame(
+    {
+        _COL_AP: [150, 150, 150, 160, 150, 170],
+        _COL_FP: [FP] * 6,
+        _COL_PC: [1, 2, 3, 3, 5, 3],
+    },
+    schema=TRACE_SCHEMA,
+)
+
+
+def baseline_state_transitions(
+    trace: pl.LazyFrame, memory: pl.LazyFrame
+) -> pl.LazyFrame:
+    """Single chain of joins, op1 being fetched after op0."""
+    return (
+        trace.join(
+            memory,
+            left_on=_COL_PC,
+            right_on=_COL_ADDRESS,
+            how="left",
+            maintain_order="left",
+        )
+        .rename({_COL_VALUE: _COL_ENCODED_INSTRUCTION})
+        .with_columns(OPCODE)
+        .with_columns(OP0_ADDR)
+        .join(
+            memory,
+            left_on=_COL_OP0_ADDR,
+            right_on=_COL_ADDRESS,
+            how="left",
+            maintain_order="left",
+        )
+        .rename({_COL_VALUE: _COL_OP0})
+        .with_columns(OP1_ADDR)
+        .join(
+            memory,
+            left_on=_COL_OP1_ADDR,
+            right_on=_COL_ADDRESS,
+            how="left",
+            maintain_order="left",
+        )
+        .rename({_COL_VALUE: _COL_OP1})
+        .with_columns(DST_ADDR)
+        .join(
+            memory,
+            left_on=_COL_DST_ADDR,
+            right_on=_COL_ADDRESS,
+            how="left",
+            maintain_order="left",
+        )
+        .rename({_COL_VALUE: _COL_DST})
+        .with_columns(
+            pl.when(pl.col(_COL_OPCODE).eq(JNZ_OPCODE) & pl.col(_COL_DST).eq(0))
+            .then(JNZ_OPCODE_TAKEN)
+            .otherwise(pl.col(_COL_OPCODE))
+            .alias(_COL_OPCODE)
+        )
+        .select(STATE_TRANSITIONS_COLUMNS)
+    )
+
+
+# Opcode categoricals are built without the string cache that main enables
+@pytest.mark.filterwarnings("ignore::polars.exceptions.CategoricalRemappingWarning")
+@pytest.mark.parametrize("resolution", ["join", "merge"])
+def test_resolve_state_transitions_matches_baseline(
+    memory_frame, chunked_memory, resolution
+):
+    memory = chunked_memory(memory_frame(FELTS), 4)
+    trace = TRACE.lazy()
+    instructions = decode_instructions(trace, memory).lazy()
+
+    state_transitions = (
+        resolve_state_transitions(trace, memory.lazy(), instructions).collect()
+        if resolution == "join"
+        else resolve_state_transitions_merge(trace, memory, instructions)
+    ).cast({_COL_OPCODE: pl.String})
+    expected = (
+        baseline_state_transitions(trace, memory.lazy())
+        .collect()
+        .cast({_COL_OPCODE: pl.String})
+    )
+
+    assert state_transitions.get_column(_COL_OPCODE).to_list() == [
+        "add_opcode",
+        "assert_eq_opcode_double_deref",
+        "jnz_opcode_taken",
+        "jnz_opcode",
+        "ret_opcode",
+        "jnz_opcode",
+    ]
+    assert state_transitions.equals(expected)
@@ -0,0 +1,53 @@
+import polars as pl
+from prover.adapter.operands import _COL_DST, _COL_OP0, _COL_OP1
+from prover.adapter.trace import _COL_AP
+from prover.components.blake_compress_opcode import (
+    COUNTER,
+    MESSAGE,
+    MESSAGE_SIZE,
+    NEW_STATE,
+    STATE,
+    STATE_SIZE,
+    gather_blake_memory,
+)
+
+AP = 100
+STATE_PTR = 200
+MESSAGE_PTR = 300
+COUNTER_VALUE = 64
+
+
+def test_gather_blake_memory(memory_frame, chunked_memory):
+    felts = {
+        **{AP + i: 1000 + i for i in range(STATE_SIZE)},
+        **{STATE_PTR + i: 2000 + i for i in range(STATE_SIZE)},
+        **{MESSAGE_PTR + i: 3000 + i for i in range(MESSAGE_SIZE)},
+        # Would be the new state if the counter were read as a pointer
+        **{COUNTER_VALUE + i: 4000 + i for i in range(STATE_SIZE)},
+    }
+    memory = chunked_memory(memory_frame(felts), 8)
+    state_transitions = pl.DataFrame(
+        {
+            _COL_AP: [AP],
+            _COL_OP0: [STATE_PTR],
+            _COL_OP1: [MESSAGE_PTR],
+            _COL_DST: [COUNTER_VALUE],
+        },
+        schema={
+            _COL_AP: pl.UInt32,
+            _COL_OP0: pl.Int128,
+            _COL_OP1: pl.Int128,
+            _COL_DST: pl.Int128,
+        },
+    )
+
+    blake = gather_blake_memory(state_transitions, memory).select(
+        COUNTER, *STATE, *MESSAGE, *NEW_STATE
+    )
+
+    assert blake.row(0) == (
+        COUNTER_VALUE,
+        *(2000 + i for i in range(STATE_SIZE)),
+        *(3000 + i for i in range(MESSAGE_SIZE)),
+        *(1000 + i for i in range(STATE_SIZE)),
+    )
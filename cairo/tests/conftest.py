@@ -0,0 +1,58 @@
+import polars as pl
+import pytest
+from prover.adapter.memory import (
+    _COL_ADDRESS,
+    _COL_VALUE,
+    DEFAULT_PRIME,
+    FELT_WORD_BITS,
+    MEMORY_SCHEMA,
+    WORD_COLUMNS,
+    ChunkedMemory,
+    memory_index,
+)
+
+
+def _memory_frame(felts: dict[int, int]) -> pl.DataFrame:
+    """Address-sorted memory holding `felts`, encoded as by `read_memory_chunks`."""
+    addresses = sorted(felts)
+    signed = [
+        felt if felt < DEFAULT_PRIME // 2 else felt - DEFAULT_PRIME
+        for felt in (felts[address] % DEFAULT_PRIME for address in addresses)
+    ]
+    return pl.DataFrame(
+        {
+            _COL_ADDRESS: addresses,
+            _COL_VALUE: [(value + 2**127) % 2**128 - 2**127 for value in signed],
+            **{
+                column: [
+                    (felts[address] % DEFAULT_PRIME >> (FELT_WORD_BITS * i))
+                    % 2**FELT_WORD_BITS
+                    for address in addresses
+                ]
+                for i, column in enumerate(WORD_COLUMNS)
+            },
+        },
+        schema=MEMORY_SCHEMA,
+    )
+
+
+@pytest.fixture
+def memory_frame():
+    return _memory_frame
+
+
+@pytest.fixture
+def chunked_memory(tmp_path):
+    """Write a memory frame as `chunk_size` rows chunk files."""
+
+    def write(memory: pl.DataFrame, chunk_size: int) -> ChunkedMemory:
+        directory = tmp_path / "memory"
+        directory.mkdir(exist_ok=True)
+        files = []
+        for chunk, offset in enumerate(range(0, memory.height, chunk_size)):
+            file_path = directory / f"{chunk:06d}.arrow"
+            memory.slice(offset, chunk_size).write_ipc(file_path)
+            files.append(file_path)
+        return ChunkedMemory(files, memory_index(files).collect())
+
+    return write
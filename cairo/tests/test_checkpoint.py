@@ -0,0 +1,73 @@
+import polars as pl
+import pytest
+from prover.checkpoint import Run, module_sources
+
+FRAME = pl.DataFrame({"x": range(10)})
+
+
+def test_stage_skips_up_to_date(tmp_path):
+    input_path = tmp_path / "input.bin"
+    input_path.write_bytes(b"0")
+    calls = []
+
+    def compute():
+        calls.append(None)
+        return FRAME
+
+    for _ in range(2):
+        output = Run(tmp_path / "run").stage("stage", compute, inputs=[input_path])
+    assert len(calls) == 1
+    assert output.collect().equals(FRAME)
+
+    input_path.write_bytes(b"01")
+    Run(tmp_path / "run").stage("stage", compute, inputs=[input_path])
+    assert len(calls) == 2
+
+
+def test_windows_resume_after_failure(tmp_path):
+    offsets = []
+
+    def compute(offset, length):
+        offsets.append(offset)
+        if offset == 6 and offsets.count(offset) == 1:
+            raise RuntimeError("interrupted")
+        return FRAME.slice(offset, length)
+
+    with pytest.raises(RuntimeError):
+        Run(tmp_path).windows("windows", FRAME.height, 3, compute)
+    output = Run(tmp_path).windows("windows", FRAME.height, 3, compute)
+
+    assert offsets == [0, 3, 6, 6, 9]
+    assert output.collect().equals(FRAME)
+
+
+def test_windows_recompute_missing_files(tmp_path):
+    offsets = []
+
+    def compute(offset, length):
+        offsets.append(offset)
+        return FRAME.slice(offset, length)
+
+    Run(tmp_path).windows("windows", FRAME.height, 3, compute)
+    (tmp_path / "windows" / "000001.arrow").unlink()
+    output = Run(tmp_path).windows("windows", FRAME.height, 3, compute)
+
+    assert offsets == [0, 3, 6, 9, 3, 6, 9]
+    assert output.collect().equals(FRAME)
+
+
+def test_windows_empty(tmp_path):
+    output = Run(tmp_path).windows(
+        "windows", 0, 3, lambda offset, length: FRAME.clear()
+    )
+
+    assert output.collect().equals(FRAME.clear())
+
+
+def test_module_sources_follow_prover_imports():
+    sources = module_sources(["prover.adapter.trace"])
+
+    assert sorted(source.name for source in sources) == [
+        "instrumentation.py",
+        "trace.py",
+    ]
@@ -0,0 +1,25 @@
+from prover.instrumentation import PrometheusSink
+
+
+def test_prometheus_sink_aggregates_per_stage(tmp_path):
+    file_path = tmp_path / "metrics.prom"
+    sink = PrometheusSink(file_path)
+
+    for window in range(3):
+        sink.emit(
+            {
+                "stage": "windows",
+                "labels": {"window": window},
+                "rows": 10,
+                "max_rss_bytes": 100 + window,
+            }
+        )
+    assert not file_path.exists()
+    sink.emit({"stage": "other", "labels": {}, "rows": 1})
+
+    assert file_path.read_text() == (
+        'prover_rows{stage="windows"} 30\n'
+        'prover_max_rss_bytes{stage="windows"} 102\n'
+    )
+    sink.flush()
+    assert file_path.read_text().endswith('prover_rows{stage="other"} 1\n')